@@ -0,0 +1,221 @@
+import mmap
+import os
+
+
+""" Low-level helpers for writing checkpoint data with as few syscalls as
+possible. """
+
+
+# Payloads of at most this many bytes skip the batched write machinery and are
+# written directly, since for them the setup cost dominates.
+SMALL_WRITE_THRESHOLD = 64 * 1024
+# Payloads of at least this many bytes bypass the page cache entirely with
+# direct I/O, which avoids writing multi-GB checkpoints through the cache
+# twice.
+DIRECT_WRITE_THRESHOLD = 8 * 1024 * 1024
+# Alignment that direct I/O requires for both the buffer and the write size.
+_DIRECT_ALIGNMENT = 4096
+# Payloads with fewer chunks than this are also written directly, since
+# there is nothing to gain from batching them.
+_MIN_BATCH_CHUNKS = 4
+
+
+def _max_segments():
+    """ Determines the maximum number of buffers that can be passed to a
+    single vectored write.
+    Returns:
+      The maximum number of buffers. """
+    try:
+        return os.sysconf("SC_IOV_MAX")
+    except (AttributeError, ValueError, OSError):
+        # Fall back to the minimum that POSIX guarantees.
+        return 16
+
+
+def _write_chunks(fd, chunks):
+    """ Writes a set of chunks to an open file, batching them into as few
+    submissions as possible.
+    Args:
+      fd: The file descriptor to write to.
+      chunks: A list of bytes-like chunks to write.
+    Returns:
+      The total number of bytes written. """
+    if not hasattr(os, "writev"):
+        # Vectored writes are not available on this platform, so write the
+        # chunks one-at-a-time.
+        return sum(os.write(fd, chunk) for chunk in chunks)
+
+    written = 0
+    max_segments = _max_segments()
+    for start in range(0, len(chunks), max_segments):
+        batch = [memoryview(chunk) for chunk in chunks[start:start +
+                                                       max_segments]]
+
+        while batch:
+            batch_written = os.writev(fd, batch)
+            written += batch_written
+
+            # Drop the buffers that were written completely, in case of a
+            # short write.
+            while batch and batch_written >= len(batch[0]):
+                batch_written -= len(batch[0])
+                batch.pop(0)
+            if batch and batch_written:
+                batch[0] = batch[0][batch_written:]
+
+    return written
+
+
+def _write_direct(save_file, chunks, total_size):
+    """ Writes a large checkpoint with direct I/O, bypassing the page cache.
+    The payload is copied into a page-aligned buffer, padded out to the
+    required alignment, and the file is truncated back to the real size
+    afterwards.
+    Args:
+      save_file: The file to write the checkpoint to.
+      chunks: A list of bytes-like chunks to write.
+      total_size: The total payload size, in bytes.
+    Returns:
+      True on success, or False if the file could not be written with direct
+      I/O, in which case the caller should fall back to buffered writes. """
+    # Pad the write size out to the required alignment.
+    padded_size = ((total_size + _DIRECT_ALIGNMENT - 1) //
+                   _DIRECT_ALIGNMENT) * _DIRECT_ALIGNMENT
+
+    try:
+        fd = os.open(save_file,
+                     os.O_WRONLY | os.O_CREAT | os.O_DIRECT | os.O_CLOEXEC,
+                     0o644)
+    except OSError:
+        # The filesystem doesn't allow direct I/O on this file.
+        return False
+
+    # An anonymous mapping is always page-aligned, which satisfies the
+    # alignment requirement on the buffer.
+    buffer = mmap.mmap(-1, padded_size)
+    try:
+        for chunk in chunks:
+            buffer.write(chunk)
+
+        try:
+            # Direct writes may complete partially, so keep submitting until
+            # the whole buffer is on disk. Completions come in multiples of
+            # the alignment, so the buffer offset stays aligned.
+            with memoryview(buffer) as view:
+                written = 0
+                while written < padded_size:
+                    written += os.write(fd, view[written:])
+        except OSError:
+            # The filesystem accepted the open, but rejected the write.
+            return False
+
+        # Clip the alignment padding off the end of the file.
+        os.ftruncate(fd, total_size)
+        # Direct I/O bypasses the cache, but the metadata still has to be
+        # made durable explicitly.
+        os.fdatasync(fd)
+    finally:
+        buffer.close()
+        os.close(fd)
+
+    return True
+
+
+class CheckpointWriter(object):
+    """ Accumulates the chunks that make up a model checkpoint, and then
+    writes them all to disk in one batched submission. This keeps the
+    per-chunk syscall overhead off the critical path. """
+
+    def __init__(self, save_file, small_write_threshold=SMALL_WRITE_THRESHOLD):
+        """
+        Args:
+          save_file: The file in which to save the checkpoint.
+          small_write_threshold: Payloads of at most this many bytes are
+                                 written with a single plain write instead of
+                                 the batched path. """
+        self.__save_file = save_file
+        self.__small_write_threshold = small_write_threshold
+
+        # Chunks that are waiting to be written.
+        self.__chunks = []
+        # The save file's descriptor, once it has been opened.
+        self.__fd = None
+
+    def __open(self):
+        """ Opens the save file if it isn't open already. The descriptor is
+        kept for the lifetime of the writer, so repeated checkpoints skip the
+        per-save open and close. It is also opened lazily, so merely creating
+        a writer doesn't create the file.
+        Returns:
+          The open file descriptor. """
+        if self.__fd is None:
+            self.__fd = os.open(self.__save_file,
+                                os.O_WRONLY | os.O_CREAT | os.O_CLOEXEC,
+                                0o644)
+
+        return self.__fd
+
+    def close(self):
+        """ Closes the save file, if it is open. """
+        if self.__fd is not None:
+            os.close(self.__fd)
+            self.__fd = None
+
+    def __del__(self):
+        self.close()
+
+    def set_small_write_threshold(self, threshold):
+        """ Changes the threshold below which payloads are written directly.
+        Args:
+          threshold: The new threshold, in bytes. """
+        self.__small_write_threshold = threshold
+
+    def add_chunk(self, chunk):
+        """ Adds a chunk of model data to be written.
+        Args:
+          chunk: The raw chunk data, as a bytes-like object. """
+        self.__chunks.append(chunk)
+
+    def write(self):
+        """ Writes all the accumulated chunks to the save file. The file is
+        opened only once, and the chunks are submitted together instead of
+        individually.
+        Returns:
+          The total number of bytes written. """
+        # Figure out the total payload size up-front so we can pick the right
+        # write path. The chunk-count heuristic only chooses between the
+        # plain and vectored buffered writes; direct I/O is purely a matter
+        # of payload size.
+        total_size = sum(len(chunk) for chunk in self.__chunks)
+        small = (total_size <= self.__small_write_threshold or
+                 len(self.__chunks) < _MIN_BATCH_CHUNKS)
+
+        if total_size >= DIRECT_WRITE_THRESHOLD and hasattr(os, "O_DIRECT"):
+            # Large checkpoint. Try to bypass the page cache entirely.
+            if _write_direct(self.__save_file, self.__chunks, total_size):
+                self.__chunks = []
+                return total_size
+            # The filesystem rejected direct I/O; fall back to the buffered
+            # path.
+
+        fd = self.__open()
+        os.lseek(fd, 0, os.SEEK_SET)
+
+        if small:
+            # Small checkpoint. The batching setup would cost more than it
+            # saves, so just write it directly. Even these writes can complete
+            # partially, so keep submitting until everything is on disk.
+            with memoryview(b"".join(self.__chunks)) as payload:
+                written = 0
+                while written < len(payload):
+                    written += os.write(fd, payload[written:])
+        else:
+            written = _write_chunks(fd, self.__chunks)
+
+        # Clip anything left over from a previous, larger checkpoint.
+        os.ftruncate(fd, written)
+
+        # Start fresh for the next checkpoint.
+        self.__chunks = []
+
+        return written
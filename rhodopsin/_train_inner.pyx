@@ -0,0 +1,25 @@
+# cython: language_level=3
+
+
+""" Compiled driver for the inner training loop. Keeping the dispatch loop
+out of the interpreter removes the per-step bytecode overhead entirely. """
+
+
+def run_block(object step, int n, object should_stop):
+    """ Runs up to n training steps, stopping early if requested.
+    Args:
+      step: The function that runs a single training step.
+      n: The number of steps to run.
+      should_stop: Called after each step; if it returns true, the block
+                   stops early.
+    Returns:
+      The number of steps completed. """
+    cdef int i
+
+    for i in range(n):
+        step()
+
+        if should_stop():
+            return i + 1
+
+    return n
@@ -8,6 +8,11 @@ except ImportError:
 class DelegatingCallback(Callback):
     """
     A simple Keras callback that delegates to something else.
+
+    All the hooks we don't delegate are overridden with empty stubs, so
+    Keras's callback dispatch does no work for them. The batch-level hooks in
+    particular fire thousands of times per epoch, and the base class versions
+    are not free.
     """
 
     def __init__(self, on_epoch_end=None):
@@ -18,5 +23,37 @@ class DelegatingCallback(Callback):
         """
         super().__init__()
 
+        # Our logs are plain dicts, so Keras doesn't need to convert them.
+        self._supports_tf_logs = True
+
         if on_epoch_end:
+            # Attach directly as an instance attribute, so Keras's dispatch
+            # finds the delegate without any indirection.
             self.on_epoch_end = on_epoch_end
+
+    def on_train_begin(self, logs=None):
+        pass
+
+    def on_train_end(self, logs=None):
+        pass
+
+    def on_epoch_begin(self, epoch, logs=None):
+        pass
+
+    def on_train_batch_begin(self, batch, logs=None):
+        pass
+
+    def on_train_batch_end(self, batch, logs=None):
+        pass
+
+    def on_test_batch_begin(self, batch, logs=None):
+        pass
+
+    def on_test_batch_end(self, batch, logs=None):
+        pass
+
+    def on_predict_batch_begin(self, batch, logs=None):
+        pass
+
+    def on_predict_batch_end(self, batch, logs=None):
+        pass
@@ -1,5 +1,39 @@
+import signal
+import sys
+
 from .experiment_base import ExperimentBase
 
+try:
+    from ._train_inner import run_block as _compiled_run_block
+except ImportError:
+    # The compiled extension isn't built; the generated pure-Python driver
+    # will be used instead.
+    _compiled_run_block = None
+
+
+# Largest number of training steps to unroll into a single generated driver.
+_MAX_BLOCK_SIZE = 32
+
+
+def _make_train_block(num_steps):
+    """ Generates a specialized driver that runs a fixed number of training
+    steps as straight-line code, with no loop overhead.
+    Args:
+      num_steps: The number of steps the driver runs.
+    Returns:
+      A function taking (run, should_stop) that runs up to num_steps training
+      steps, stopping early if should_stop() becomes true, and returns the
+      number of steps it completed. """
+    lines = ["def _train_block(run, should_stop):"]
+    for i in range(1, num_steps + 1):
+        lines.append("    run()")
+        lines.append("    if should_stop(): return %d" % (i))
+    lines.append("    return %d" % (num_steps))
+
+    scope = {}
+    exec("\n".join(lines), scope)
+    return scope["_train_block"]
+
 
 class Experiment(ExperimentBase):
     """ Facilitates user control of deep learning experiments by providing a CLI
@@ -15,45 +49,127 @@ class Experiment(ExperimentBase):
         """
         super().__init__(**kwargs)
 
-        # Whether we want to enter the menu as soon as we can.
-        self.__enter_menu = False
-        self.__testing_interval = testing_interval
+        self._testing_interval = testing_interval
+
+        # Pre-generate an unrolled driver for the inner training loop,
+        # specialized to this experiment's testing interval.
+        self._block_size = min(testing_interval, _MAX_BLOCK_SIZE)
+        self._train_block = _make_train_block(self._block_size)
+
+        # Whether a Ctrl+C has already been handled, so a second one means
+        # "stop" instead of "show the menu".
+        self._sigint_seen = False
 
     def _handle_signal(self, signum, frame):
-        """ Handles the user hitting Ctrl+C. This is supposed to bring up the
-        menu.
+        """ Handles SIGINT and SIGTERM. The first Ctrl+C brings up the menu;
+        a second Ctrl+C, or any SIGTERM, saves the model and exits after the
+        current iteration. The wakeup fd does the actual signaling, so all we
+        do here is classify the request and give some immediate feedback.
         Args:
           signum: The signal number that triggered this.
           frame: Current stack frame. """
-        if self.__enter_menu:
-            # Already entering the menu.
+        if signum == signal.SIGTERM or self._sigint_seen:
+            print("Stop requested, saving and exiting after current"
+                  " iteration.")
+            self._stop = True
             return
 
-        # Give some immediate feedback.
+        self._sigint_seen = True
         print("Signal caught, entering menu after current iteration.")
 
-        # Indicate that we want to enter the menu on the next iteration.
-        self.__enter_menu = True
-
     def train(self):
         """ Runs the training procedure to completion. """
+        status = self.get_status()
+
+        # Hoist the hot attributes into locals.
+        run = self._run_training_step
+        should_stop = self.should_stop
+        train_block = self._train_block
+        block_size = self._block_size
+        interval = self._testing_interval
+
+        # The signals whose delivery we confine to the training phase, so the
+        # bookkeeping below never races with the handler.
+        hot_signals = {signal.SIGINT, signal.SIGTERM}
+
+        try:
+            self.__train_loop(status, run, should_stop, train_block,
+                              block_size, interval, hot_signals)
+        finally:
+            # Never leave the process with the signals blocked, no matter how
+            # we left the loop.
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, hot_signals)
+
+    def __train_loop(self, status, run, should_stop, train_block, block_size,
+                     interval, hot_signals):
+        """ The main training loop. This is separated out so that train()
+        can restore the signal mask if anything in here raises.
+        Args:
+          status: The status parameters.
+          run: The hoisted training-step function.
+          should_stop: The hoisted stop predicate.
+          train_block: The generated driver for the inner loop.
+          block_size: The number of steps the driver runs per call.
+          interval: The testing interval.
+          hot_signals: The signals confined to the training phase. """
         while True:
-            # Run training and testing iterations.
-            for i in range(0, self.__testing_interval):
-                if self.__enter_menu:
-                    # Show the menu.
-                    self._show_main_menu()
-                    self.__enter_menu = False
+            # Steps completed in this testing interval.
+            done = 0
+
+            # Let signals in while the training steps run. The handler only
+            # classifies them and writes the wakeup fd, so the inner loop
+            # itself carries no menu check at all.
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, hot_signals)
+
+            # Run training iterations.
+            while done < interval:
+                if _compiled_run_block is not None:
+                    # The compiled driver can run the whole remaining
+                    # interval in one call.
+                    ran = _compiled_run_block(run, interval - done,
+                                              should_stop)
+                else:
+                    # Run the next block of training steps through the
+                    # unrolled driver.
+                    block = min(block_size, interval - done)
+                    if block == block_size:
+                        ran = train_block(run, should_stop)
+                    else:
+                        # Partial block left over at the end of the interval.
+                        ran = 0
+                        while ran < block:
+                            run()
+                            ran += 1
+                            if should_stop():
+                                break
+
+                done += ran
+
+                if should_stop():
+                    break
+
+            # Check for a pending menu request while the signals are still
+            # unblocked, then defer any further ones until the next interval.
+            menu_requested = self._signal_pending() and not self._stop
+            signal.pthread_sigmask(signal.SIG_BLOCK, hot_signals)
+
+            # Flush the accumulated iteration count with a single add.
+            status.fetch_add("iterations", done)
 
-                    # Save after the user adjusts something.
-                    self._checkpoint()
+            if self._stop:
+                # Save our progress and exit gracefully.
+                self._checkpoint()
+                sys.exit(0)
 
-                self._run_training_step()
+            if menu_requested:
+                # Show the menu.
+                self._show_main_menu()
+                self._sigint_seen = False
 
-                # Update the iteration counter.
-                iterations = self.__status.get_value("iterations")
-                self.__status.update("iterations", iterations + 1)
+                # Save after the user adjusts something.
+                self._checkpoint()
 
             self._run_testing_step()
-            # Save the model after each testing iteration.
-            self._checkpoint()
+            # Save the model after each testing iteration. The save runs in
+            # the background, so the next training step can start immediately.
+            self._checkpoint_async()
@@ -1,80 +1,238 @@
-import abc
+import functools
 import os
+import select
 import signal
+import threading
 
+from . import _checkpoint_io
 from . import menu
 from . import params
 
 
-class ExperimentBase(abc.ABC):
+# Read end of the process-wide signal wakeup pipe, once it has been created.
+_wake_read_fd = None
+
+
+def _get_wakeup_fd():
+    """ Lazily creates the process-wide signal wakeup pipe, and installs its
+    write end with signal.set_wakeup_fd(). The pipe is created only once per
+    process and shared by all experiments, so repeated experiment
+    construction doesn't leak descriptors.
+    Returns:
+      The read end of the pipe. """
+    global _wake_read_fd
+
+    if _wake_read_fd is None:
+        if hasattr(os, "pipe2"):
+            read_fd, write_fd = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
+        else:
+            read_fd, write_fd = os.pipe()
+            os.set_blocking(read_fd, False)
+            os.set_blocking(write_fd, False)
+
+        signal.set_wakeup_fd(write_fd)
+        _wake_read_fd = read_fd
+
+    return _wake_read_fd
+
+
+@functools.lru_cache(maxsize=128)
+def _stat_exists(path):
+    """ Checks whether a path exists, caching the result so harnesses that
+    create many experiments with the same save file only pay for the stat
+    syscall once. The cache is cleared whenever a checkpoint is saved.
+    Args:
+      path: The path to check.
+    Returns:
+      True if the path exists, False otherwise. """
+    return os.path.exists(path)
+
+
+class ExperimentBase(object):
     """ Base class for experiments that defines the API. """
 
     def __init__(self, save_file="experiment.rhp", hyperparams=None,
-                 status=None):
+                 status=None, shared=False):
         """
         Args:
           save_file: File in which to save the model data.
           hyperparams: Optional custom hyperparameters to use.
-          status: Optional custom status parameters to use. """
-        self.__save_file = save_file
+          status: Optional custom status parameters to use.
+          shared: If true, the default status parameters are allocated in
+                  shared memory, so multiple worker processes can share them.
+        """
+        self._save_file = save_file
 
         # Create hyperparameters.
-        self.__params = hyperparams
-        if self.__params is None:
-            self.__params = params.HyperParams()
+        self._params = hyperparams
+        if self._params is None:
+            self._params = params.HyperParams()
+
+        # Add default hyperparameters.
+        self._params.add_if_not_set("checkpoint_write_threshold",
+                                    _checkpoint_io.SMALL_WRITE_THRESHOLD)
 
         # Create status parameters.
-        self.__status = status
-        if self.__status is None:
-            self.__status = params.Status()
+        self._status = status
+        if self._status is None:
+            if shared:
+                self._status = params.SharedStatus()
+            else:
+                self._status = params.Status()
 
         # Add default status parameters.
-        self.__status.add_if_not_set("iterations", 0)
+        self._status.add_if_not_set("iterations", 0)
+
+        # Checkpoint saves that are currently in-flight.
+        self._checkpoint_threads = []
+
+        # Long-lived writer for the save file, so repeated checkpoints reuse
+        # the same descriptor. It opens the file lazily, on the first save.
+        self._checkpoint_writer = _checkpoint_io.CheckpointWriter(save_file)
 
-        # Register the signal handler.
+        # Whether a graceful stop has been requested by a signal.
+        self._stop = False
+
+        # Register the signal handler. SIGTERM gets the same treatment as
+        # Ctrl+C, so a scheduler can stop us without losing progress.
         signal.signal(signal.SIGINT, self._handle_signal)
+        signal.signal(signal.SIGTERM, self._handle_signal)
+
+        # Get the wakeup fd that the signal machinery writes to, so the
+        # training loop can check for pending signals with a cheap poll
+        # instead of a per-iteration flag.
+        self._wake_fd = _get_wakeup_fd()
 
         # Create the menu tree.
-        self.__menus = menu.MenuTree()
-        main_menu = menu.MainMenu(self.__params, self.__status)
-        adjust_menu = menu.AdjustMenu(self.__params, self.__status)
-        status_menu = menu.StatusMenu(self.__params, self.__status)
-        self.__menus.add_menu(main_menu)
-        self.__menus.add_menu(adjust_menu)
-        self.__menus.add_menu(status_menu)
+        self._menus = menu.MenuTree()
+        main_menu = menu.MainMenu(self._params, self._status)
+        adjust_menu = menu.AdjustMenu(self._params, self._status)
+        status_menu = menu.StatusMenu(self._params, self._status)
+        self._menus.add_menu(main_menu)
+        self._menus.add_menu(adjust_menu)
+        self._menus.add_menu(status_menu)
 
         # Run custom initialization code.
         self._init_experiment()
 
         # Check for an existing model.
-        if self._model_exists(self.__save_file):
-            load_menu = menu.LoadModelMenu(self.__params, self.__status,
-                                           self.__save_file)
+        if self._model_exists(self._save_file):
+            load_menu = menu.LoadModelMenu(self._params, self._status,
+                                           self._save_file)
             load_menu.show()
 
             # Check what was selected.
             if load_menu.should_load():
                 # Load the model.
-                self._load_model(self.__save_file)
+                self._load_model(self._save_file)
 
-    @abc.abstractmethod
     def _handle_signal(self, signum, frame):
         """ Handles the user hitting Ctrl+C. This is supposed to bring up the
-        menu.
+        menu. It must be implemented by a subclass.
         Args:
           signum: The signal number that triggered this.
           frame: Current stack frame. """
-        pass
+        raise NotImplementedError(
+            "_handle_signal() must be implemented by subclass.")
+
+    def _signal_pending(self):
+        """ Checks whether a signal has arrived since the last check. This is
+        a non-blocking read of the wakeup fd, so it is cheap enough to call
+        from the training loop.
+        Returns:
+          True if a signal arrived, False otherwise. """
+        ready, _, _ = select.select([self._wake_fd], (), (), 0)
+        if not ready:
+            return False
+
+        # Drain the fd, so the next check starts fresh.
+        os.read(self._wake_fd, 64)
+        return True
 
     def _show_main_menu(self):
         """ Show the main menu. """
-        self.__menus.show("main")
+        self._menus.show("main")
+
+    def _run_checkpoint_save(self):
+        """ Runs _save_model() for a background checkpoint, capturing any
+        exception on the thread object so it can be re-raised when the save
+        is reaped. """
+        try:
+            self._save_model(self._save_file)
+        except BaseException as error:
+            threading.current_thread().save_error = error
+
+    def _reap_checkpoints(self, wait=False):
+        """ Reaps any checkpoint saves that have completed, in a single pass
+        over the in-flight list instead of blocking on them one-by-one.
+        Args:
+          wait: If true, also wait for the saves that are still running.
+        Raises:
+          The exception from a failed background save, if there was one, so a
+          broken save path surfaces at the next checkpoint. """
+        finished = []
+
+        if wait:
+            for thread in self._checkpoint_threads:
+                thread.join()
+
+            finished = self._checkpoint_threads
+            self._checkpoint_threads = []
+
+        else:
+            # Collect everything that has already finished, without blocking.
+            still_running = []
+            for thread in self._checkpoint_threads:
+                if thread.is_alive():
+                    still_running.append(thread)
+                else:
+                    thread.join()
+                    finished.append(thread)
+
+            self._checkpoint_threads = still_running
+
+        for thread in finished:
+            error = getattr(thread, "save_error", None)
+            if error is not None:
+                raise error
+
+    def _wait_for_checkpoint(self):
+        """ Waits for any in-flight checkpoint save to finish. """
+        self._reap_checkpoints(wait=True)
 
     def _checkpoint(self):
         """
-        Saves the model at this point.
+        Saves the model at this point. It will not return until the save is
+        complete.
         """
-        self._save_model(self.__save_file)
+        # Make sure any previous asynchronous save has finished first.
+        self._wait_for_checkpoint()
+
+        self._save_model(self._save_file)
+
+        # The save file may exist now even if it didn't before.
+        _stat_exists.cache_clear()
+
+    def _checkpoint_async(self):
+        """
+        Saves the model at this point, without waiting for the save to
+        complete. The save runs in the background, so training can continue
+        while the checkpoint is written to disk. At most one save can be
+        in-flight at a time; any previous one is waited for before the new one
+        is started.
+        """
+        # Reap whatever has already finished without blocking, and only wait
+        # if a previous save is actually still in flight.
+        self._reap_checkpoints()
+        if self._checkpoint_threads:
+            self._reap_checkpoints(wait=True)
+
+        thread = threading.Thread(target=self._run_checkpoint_save)
+        self._checkpoint_threads.append(thread)
+        thread.start()
+
+        # The save file may exist now even if it didn't before.
+        _stat_exists.cache_clear()
 
     def _init_experiment(self):
         """ Runs any custom initialization code for the experiment. This will be
@@ -83,17 +241,17 @@ class ExperimentBase(abc.ABC):
         """
         pass
 
-    @abc.abstractmethod
     def _run_training_step(self):
         """ Runs a single training iteration. This is meant to be overidden by a
         subclass. """
-        pass
+        raise NotImplementedError(
+            "_run_training_step() must be implemented by subclass.")
 
-    @abc.abstractmethod
     def _run_testing_step(self):
         """ Runs a single testing iteration. This is meant to be overidden by a
         subclass. """
-        pass
+        raise NotImplementedError(
+            "_run_testing_step() must be implemented by subclass.")
 
     def _save_model(self, save_file):
         """ Saves the model. By default, it does nothing. It should be
@@ -102,6 +260,41 @@ class ExperimentBase(abc.ABC):
           save_file: The path at which to save the model. """
         pass
 
+    def _write_model_data(self, save_file, chunks):
+        """ Helper that _save_model() implementations can use to write the
+        model data efficiently. All the chunks are accumulated first and then
+        submitted to the OS in one batch, so the per-chunk write overhead
+        stays off the critical path.
+        Args:
+          save_file: The path at which to save the model.
+          chunks: An iterable of bytes-like chunks that make up the model
+                  data.
+        Returns:
+          The total number of bytes written. """
+        threshold = self._params.get_value("checkpoint_write_threshold")
+
+        if save_file == self._save_file:
+            # Use the long-lived writer, so the descriptor stays open across
+            # checkpoints.
+            writer = self._checkpoint_writer
+            writer.set_small_write_threshold(threshold)
+
+            for chunk in chunks:
+                writer.add_chunk(chunk)
+
+            return writer.write()
+
+        # Writing somewhere else, so use a one-off writer.
+        writer = _checkpoint_io.CheckpointWriter(
+            save_file, small_write_threshold=threshold)
+        try:
+            for chunk in chunks:
+                writer.add_chunk(chunk)
+
+            return writer.write()
+        finally:
+            writer.close()
+
     def _load_model(self, save_file):
         """ Loads a model from disk. If _save_model() is used, this must be
         implemented by a subclass. Note that this is not an abstract method,
@@ -118,21 +311,28 @@ class ExperimentBase(abc.ABC):
         sophisticated functionality.
         Args:
           save_file: The possible path to the saved model. """
-        return os.path.exists(save_file)
+        return _stat_exists(save_file)
 
-    @abc.abstractmethod
     def train(self):
-        """ Runs the training procedure to completion. """
-        pass
+        """ Runs the training procedure to completion. It must be implemented
+        by a subclass. """
+        raise NotImplementedError("train() must be implemented by subclass.")
+
+    def should_stop(self):
+        """
+        Returns:
+          True if a stop was requested by a signal, in which case the
+          experiment should checkpoint and exit as soon as possible. """
+        return self._stop
 
     def get_params(self):
         """
         Returns:
           The hyperparameters being used for this experiment. """
-        return self.__params
+        return self._params
 
     def get_status(self):
         """
         Returns:
           The status parameters being used for this experiment. """
-        return self.__status
+        return self._status
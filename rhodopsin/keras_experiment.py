@@ -1,4 +1,5 @@
-import abc
+import signal
+import sys
 
 from .delegating_callback import DelegatingCallback
 from .experiment_base import ExperimentBase
@@ -7,6 +8,11 @@ from .experiment_base import ExperimentBase
 class KerasExperiment(ExperimentBase):
     """
     An experiment meant to better integrate with Keras.
+
+    A stop request (a second Ctrl+C, or a SIGTERM) is honored at the end of
+    the current epoch. To stop mid-epoch, add a callback that checks
+    should_stop() at the end of each batch and sets model.stop_training
+    accordingly.
     """
 
     def __init__(self, *args, **kwargs):
@@ -18,11 +24,11 @@ class KerasExperiment(ExperimentBase):
 
         # If true, indicates that we should enter the menu at the end of the
         # next epoch.
-        self.__enter_menu = False
+        self._enter_menu = False
 
         # Users should add this callback to their model so that the Rhodopsin
         # menu works.
-        self.__callback = DelegatingCallback(on_epoch_end=self.__on_epoch_end)
+        self._callback = DelegatingCallback(on_epoch_end=self.__on_epoch_end)
 
     def __on_epoch_end(self, epoch, logs=None):
         """
@@ -32,52 +38,62 @@ class KerasExperiment(ExperimentBase):
         """
         self._update_after_epoch(epoch, logs=logs)
 
-        if not self.__enter_menu:
+        if self._stop:
+            # Save our progress and exit gracefully.
+            self._checkpoint()
+            sys.exit(0)
+
+        if not self._enter_menu:
             # Nothing to do.
             return
 
         # Enter the menu.
         self._show_main_menu()
-        self.__enter_menu = False
+        self._enter_menu = False
 
         # Update the model.
         self._update_after_menu()
         # Save the model.
         self._checkpoint()
 
-    @abc.abstractmethod
     def _update_after_menu(self):
         """
         This function is run after the user exits from a menu. It should
         perform any reconfiguration that is necessary due to the user's actions.
+        It must be implemented by a subclass.
         """
-        pass
+        raise NotImplementedError(
+            "_update_after_menu() must be implemented by subclass.")
 
-    @abc.abstractmethod
     def _update_after_epoch(self, epoch, logs=None):
         """
         This function is run after an epoch finishes. It should update any
-        status values that require this.
+        status values that require this. It must be implemented by a subclass.
+        Implementations that record several metrics should collect them into
+        a dict and apply them with a single Status.update_many() call.
         :param epoch: The epoch number.
         :param logs: The log dictionary from Keras.
         """
-        pass
+        raise NotImplementedError(
+            "_update_after_epoch() must be implemented by subclass.")
 
     def _handle_signal(self, signum, frame):
-        """ Handles the user hitting Ctrl+C. This is supposed to bring up the
-        menu.
+        """ Handles SIGINT and SIGTERM. The first Ctrl+C brings up the menu
+        at the end of the current epoch; a second Ctrl+C, or any SIGTERM,
+        saves the model and exits instead.
         Args:
           signum: The signal number that triggered this.
           frame: Current stack frame. """
-        if self.__enter_menu:
-            # Already entering the menu.
+        if signum == signal.SIGTERM or self._enter_menu:
+            print("Stop requested, saving and exiting after current epoch.")
+            self._stop = True
             return
 
         # Give some immediate feedback.
         print("Signal caught, entering menu after current epoch.")
 
         # Indicate that we want to enter the menu on the next iteration.
-        self.__enter_menu = True
+        self._enter_menu = True
 
     def _run_testing_step(self):
         """
@@ -92,7 +108,7 @@ class KerasExperiment(ExperimentBase):
         work.
         :returns: The callback.
         """
-        return self.__callback
+        return self._callback
 
     def train(self):
         """
@@ -1,4 +1,5 @@
 import collections
+import multiprocessing
 
 
 class Params(object):
@@ -6,21 +7,21 @@ class Params(object):
 
     def __init__(self):
         # Actual dict containing parameters and their values.
-        self.__parameters = {}
+        self._parameters = {}
         # Keeps track of parameters that were changed for get_changed.
-        self.__changed = set()
+        self._changed = set()
 
     def add(self, name, value):
         """ Adds a new hyperparameter.
         Args:
           name: The name of the parameter.
           value: The initial value of the parameter. """
-        if name in self.__parameters:
+        if name in self._parameters:
             raise NameError("Parameter '%s' already exists." % (name))
 
-        self.__parameters[name] = value
+        self._parameters[name] = value
         # New parameters automatically count as "changed".
-        self.__changed.add(name)
+        self._changed.add(name)
 
     def add_if_not_set(self, name, value):
         """ Adds a new parameter, but only if it doesn't already exist. Otherwise,
@@ -28,7 +29,7 @@ class Params(object):
         Args:
           name: The name of the parameter.
           value: The value to set for the parameter. """
-        if name in self.__parameters:
+        if name in self._parameters:
             # Already set.
             return
 
@@ -39,16 +40,43 @@ class Params(object):
         Args:
           name: The name of the parameter.
           value: The initial value of the parameter. """
-        if name not in self.__parameters:
-            raise NameError("Parameter '%s' does not exist." % (name))
+        self.update_many({name: value})
 
-        if self.__parameters[name] == value:
-            # Already set. Don't update.
-            return
+    def update_many(self, updates):
+        """ Updates several existing parameters in a single operation. This is
+        cheaper than calling update() once per parameter when multiple values
+        change on every training step.
+        Args:
+          updates: A dict mapping parameter names to their new values. """
+        for name in updates:
+            if name not in self._parameters:
+                raise NameError("Parameter '%s' does not exist." % (name))
+
+        # Only parameters whose values actually change get marked.
+        changed = [name for name, value in updates.items()
+                   if self._parameters[name] != value]
+
+        self._parameters.update(updates)
+        self._changed.update(changed)
+
+    def fetch_add(self, name, delta):
+        """ Adds to a numeric parameter, in a single operation instead of a
+        separate read and update. This is the preferred way to advance
+        counters from the training loop.
+        Args:
+          name: The name of the parameter.
+          delta: The amount to add to the current value.
+        Returns:
+          The new value of the parameter. """
+        if name not in self._parameters:
+            raise NameError("Parameter '%s' does not exist." % (name))
 
-        self.__parameters[name] = value
+        value = self._parameters[name] + delta
+        self._parameters[name] = value
         # Mark the parameter as changed.
-        self.__changed.add(name)
+        self._changed.add(name)
+
+        return value
 
     def get_value(self, name):
         """ Gets the value of a hyperparameter.
@@ -56,33 +84,70 @@ class Params(object):
           name: The name of the hyperparameter.
         Returns:
           The value of said hyperparameter. """
-        if name not in self.__parameters:
+        if name not in self._parameters:
             raise NameError("Parameter '%s' does not exist." % (name))
 
-        return self.__parameters[name]
+        return self._parameters[name]
 
     def get_all(self):
         """
         Returns:
           List of the names of all parameters. """
-        return list(self.__parameters.keys())
+        return list(self._parameters.keys())
 
     def get_changed(self):
         """
         Returns:
           List of the names of the parameters that have been updated since this
           was last called. """
-        changed = list(self.__changed)
+        changed = list(self._changed)
         # Clear the set for next time.
-        self.__changed.clear()
+        self._changed.clear()
 
         return changed
 
 
 class HyperParams(Params):
-    """ Represents hyperparameters that can be used to configure an experiment. """
+    """ Represents hyperparameters that can be used to configure an experiment.
+
+    Values are additionally cached as instance attributes, so the frequent
+    reads from user training code cost a single dict lookup. """
+
+    # Prefix used for the attribute value cache.
+    _CACHE_PREFIX = "_v_"
+
+    def add(self, name, value):
+        super(HyperParams, self).add(name, value)
+
+        # Cache the value for fast reads.
+        setattr(self, HyperParams._CACHE_PREFIX + name, value)
+
+    def update_many(self, updates):
+        super(HyperParams, self).update_many(updates)
+
+        # Keep the cache current.
+        for name, value in updates.items():
+            setattr(self, HyperParams._CACHE_PREFIX + name, value)
+
+    def fetch_add(self, name, delta):
+        value = super(HyperParams, self).fetch_add(name, delta)
+
+        # Keep the cache current.
+        setattr(self, HyperParams._CACHE_PREFIX + name, value)
+
+        return value
 
-    pass
+    def get_value(self, name):
+        """ Gets the value of a hyperparameter. This is expected to be called
+        on every training step, so it reads from the attribute cache.
+        Args:
+          name: The name of the hyperparameter.
+        Returns:
+          The value of said hyperparameter. """
+        try:
+            return self.__dict__[HyperParams._CACHE_PREFIX + name]
+        except KeyError:
+            raise NameError("Parameter '%s' does not exist." % (name))
 
 class Status(Params):
     """ Status indicators from the experiment. """
@@ -94,23 +159,59 @@ class Status(Params):
         super(Status, self).__init__()
 
         # Maps parameters to historical value data.
-        self.__param_histories = {}
+        self._param_histories = {}
 
     def add(self, name, value):
         super(Status, self).add(name, value)
 
-        # We have no history at all yet.
-        self.__param_histories[name] = collections.deque([value])
+        # We have no history at all yet. The deque trims itself once it
+        # reaches the maximum length, so appends stay O(1).
+        self._param_histories[name] = collections.deque(
+            [value], maxlen=Status._MAX_HISTORY_LEN)
 
-    def update(self, name, value):
-        super(Status, self).update(name, value)
+    def _append_history(self, name, values):
+        """ Records new historical values for a parameter, trimming the
+        history if it gets too long.
+        Args:
+          name: The name of the parameter.
+          values: The values to record, as a list. """
+        self._param_histories[name].extend(values)
+
+    def update_many(self, updates):
+        super(Status, self).update_many(updates)
+
+        # Update the parameter histories.
+        for name, value in updates.items():
+            self._append_history(name, [value])
+
+    def fetch_add(self, name, delta):
+        value = super(Status, self).fetch_add(name, delta)
+
+        # Record only the new value in the history.
+        self._append_history(name, [value])
 
-        # Update the parameter history.
-        self.__param_histories[name].append(value)
+        return value
 
-        if len(self.__param_histories[name]) > Status._MAX_HISTORY_LEN:
-            # Remove an item, since we're over the max length.
-            self.__param_histories[name].popleft()
+    def bulk_update(self, name, value, history_extend=None):
+        """ Updates a parameter once for a whole batch of changes. This is
+        meant for hot loops that accumulate changes locally and flush them in
+        one go, instead of paying the bookkeeping cost on every step.
+        Args:
+          name: The name of the parameter.
+          value: The latest value of the parameter.
+          history_extend: Optionally, the intermediate values to record in the
+                          parameter history, as a list. If not provided, only
+                          the latest value is recorded. """
+        # Update the current value, without touching the history. This goes
+        # straight to the Params implementation, so that subclass locking in
+        # update_many() isn't re-entered.
+        Params.update_many(self, {name: value})
+
+        if history_extend is None:
+            history_extend = [value]
+
+        # Extend the history with a single operation.
+        self._append_history(name, history_extend)
 
     def get_history(self, name):
         """" Gets the historical values for a parameter.
@@ -118,8 +219,60 @@ class Status(Params):
           name: The name of the parameter.
         Returns:
           A list of the historical values for that parameter. """
-        if name not in self.__param_histories:
+        if name not in self._param_histories:
             # No such parameter.
             raise NameError("Parameter '%s' does not exist." % (name))
 
-        return list(self.__param_histories[name])
+        return list(self._param_histories[name])
+
+class SharedStatus(Status):
+    """ A Status whose parameter values and histories live in shared memory,
+    so that multiple worker processes observe and update the same experiment
+    status. Change-tracking for the menus remains local to each process. """
+
+    def __init__(self, manager=None):
+        """
+        Args:
+          manager: Optional multiprocessing manager to allocate the shared
+                   state from. By default, a new one is created. """
+        super(SharedStatus, self).__init__()
+
+        if manager is None:
+            manager = multiprocessing.Manager()
+        self.__manager = manager
+
+        # Swap the process-local containers for shared ones.
+        self._parameters = manager.dict()
+        self._param_histories = manager.dict()
+
+        # Guards read-modify-write updates from multiple processes.
+        self.__lock = manager.Lock()
+
+    def add(self, name, value):
+        # Skip Status.add, so the history gets allocated in shared memory.
+        Params.add(self, name, value)
+
+        # We have no history at all yet.
+        self._param_histories[name] = self.__manager.list([value])
+
+    def update_many(self, updates):
+        with self.__lock:
+            super(SharedStatus, self).update_many(updates)
+
+    def bulk_update(self, name, value, history_extend=None):
+        with self.__lock:
+            super(SharedStatus, self).bulk_update(
+                name, value, history_extend=history_extend)
+
+    def fetch_add(self, name, delta):
+        with self.__lock:
+            return super(SharedStatus, self).fetch_add(name, delta)
+
+    def _append_history(self, name, values):
+        history = self._param_histories[name]
+        history.extend(values)
+
+        while len(history) > Status._MAX_HISTORY_LEN:
+            # Remove items, since we're over the max length. The shared list
+            # has no popleft(), so pop from the front instead.
+            history.pop(0)
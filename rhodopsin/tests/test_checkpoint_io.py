@@ -0,0 +1,176 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from .. import _checkpoint_io
+
+
+class TestCheckpointWriter(unittest.TestCase):
+  """ Tests for the CheckpointWriter class. """
+
+  def setUp(self):
+    # Create a temporary directory to write checkpoints into.
+    self.__temp_dir = tempfile.mkdtemp()
+    self.__save_file = os.path.join(self.__temp_dir, "test.rhp")
+
+    # Create instance to test with.
+    self._writer = _checkpoint_io.CheckpointWriter(self.__save_file)
+
+  def tearDown(self):
+    self._writer.close()
+    shutil.rmtree(self.__temp_dir)
+
+  def __read_back(self):
+    """ Reads back the contents of the save file.
+    Returns:
+      The raw file contents. """
+    with open(self.__save_file, "rb") as save_file:
+      return save_file.read()
+
+  def test_write(self):
+    """ Tests that write() works under normal conditions. """
+    self._writer.add_chunk(b"chunk1")
+    self._writer.add_chunk(b"chunk2")
+
+    written = self._writer.write()
+
+    self.assertEqual(len(b"chunk1chunk2"), written)
+    self.assertEqual(b"chunk1chunk2", self.__read_back())
+
+  def test_write_no_chunks(self):
+    """ Tests that write() handles having no chunks to write. """
+    written = self._writer.write()
+
+    self.assertEqual(0, written)
+    self.assertEqual(b"", self.__read_back())
+
+  def test_write_many_chunks(self):
+    """ Tests that write() works when there are more chunks than can fit in a
+    single vectored write. """
+    # Set a zero threshold so the batched path is always used.
+    self._writer = _checkpoint_io.CheckpointWriter(self.__save_file,
+                                                   small_write_threshold=0)
+
+    chunks = [bytes([i]) * 10 for i in range(0, 100)]
+    for chunk in chunks:
+      self._writer.add_chunk(chunk)
+
+    # Force the chunks to be split across multiple batches.
+    old_max_segments = _checkpoint_io._max_segments
+    _checkpoint_io._max_segments = lambda: 7
+    try:
+      written = self._writer.write()
+    finally:
+      _checkpoint_io._max_segments = old_max_segments
+
+    expected = b"".join(chunks)
+    self.assertEqual(len(expected), written)
+    self.assertEqual(expected, self.__read_back())
+
+  def test_write_small_skips_batching(self):
+    """ Tests that small payloads are written directly, without the batching
+    machinery. """
+    def fail_write_chunks(*args):
+      self.fail("Small payload should not use the batched path.")
+
+    self._writer.add_chunk(b"chunk1")
+    self._writer.add_chunk(b"chunk2")
+
+    # The batched path should never be hit for a payload this small.
+    old_write_chunks = _checkpoint_io._write_chunks
+    _checkpoint_io._write_chunks = fail_write_chunks
+    try:
+      written = self._writer.write()
+    finally:
+      _checkpoint_io._write_chunks = old_write_chunks
+
+    self.assertEqual(len(b"chunk1chunk2"), written)
+    self.assertEqual(b"chunk1chunk2", self.__read_back())
+
+  def test_write_small_short_write(self):
+    """ Tests that the small-payload path handles short writes, instead of
+    silently truncating the checkpoint. """
+    real_write = os.write
+    def short_write(fd, data):
+      # Only write up to 10 bytes at a time.
+      return real_write(fd, bytes(data)[:10])
+
+    payload = b"0123456789" * 10
+    self._writer.add_chunk(payload)
+
+    os.write = short_write
+    try:
+      written = self._writer.write()
+    finally:
+      os.write = real_write
+
+    self.assertEqual(len(payload), written)
+    self.assertEqual(payload, self.__read_back())
+
+  def test_write_direct(self):
+    """ Tests that payloads above the direct-I/O threshold are still written
+    correctly, whether or not the filesystem supports direct I/O. """
+    chunks = [bytes([i]) * 4096 for i in range(0, 8)]
+
+    # Force the direct path to be attempted for this payload.
+    self._writer = _checkpoint_io.CheckpointWriter(self.__save_file,
+                                                   small_write_threshold=0)
+    old_threshold = _checkpoint_io.DIRECT_WRITE_THRESHOLD
+    _checkpoint_io.DIRECT_WRITE_THRESHOLD = 1
+    try:
+      for chunk in chunks:
+        self._writer.add_chunk(chunk)
+      written = self._writer.write()
+    finally:
+      _checkpoint_io.DIRECT_WRITE_THRESHOLD = old_threshold
+
+    expected = b"".join(chunks)
+    self.assertEqual(len(expected), written)
+    self.assertEqual(expected, self.__read_back())
+
+  def test_write_direct_single_chunk(self):
+    """ Tests that a large payload made of a single chunk still attempts the
+    direct-I/O path. """
+    calls = []
+    def recording_write_direct(*args):
+      calls.append(args)
+      return old_write_direct(*args)
+
+    chunk = b"x" * 32768
+    self._writer.add_chunk(chunk)
+
+    # Force the direct path to be attempted for this payload.
+    old_threshold = _checkpoint_io.DIRECT_WRITE_THRESHOLD
+    old_write_direct = _checkpoint_io._write_direct
+    _checkpoint_io.DIRECT_WRITE_THRESHOLD = 1
+    _checkpoint_io._write_direct = recording_write_direct
+    try:
+      written = self._writer.write()
+    finally:
+      _checkpoint_io.DIRECT_WRITE_THRESHOLD = old_threshold
+      _checkpoint_io._write_direct = old_write_direct
+
+    self.assertEqual(1, len(calls))
+    self.assertEqual(len(chunk), written)
+    self.assertEqual(chunk, self.__read_back())
+
+  def test_lazy_open(self):
+    """ Tests that creating a writer does not create the save file. """
+    self.assertFalse(os.path.exists(self.__save_file))
+
+    self._writer.add_chunk(b"data")
+    self._writer.write()
+
+    self.assertTrue(os.path.exists(self.__save_file))
+
+  def test_write_overwrites(self):
+    """ Tests that a second write() replaces the first checkpoint instead of
+    appending to it. """
+    self._writer.add_chunk(b"first checkpoint")
+    self._writer.write()
+
+    self._writer.add_chunk(b"second")
+    self._writer.write()
+
+    self.assertEqual(b"second", self.__read_back())
@@ -1,3 +1,4 @@
+import multiprocessing
 import unittest
 
 from .. import params
@@ -50,11 +51,63 @@ class TestParams(unittest.TestCase):
     self._params.update("param", 2)
     self.assertEqual(2, self._params.get_value("param"))
 
+  def test_update_many(self):
+    """ Tests that update_many() works under normal conditions. """
+    self._params.add("param1", 0)
+    self._params.add("param2", 1)
+    # Clear the changed set.
+    self._params.get_changed()
+
+    self._params.update_many({"param1": 2, "param2": 3})
+
+    self.assertEqual(2, self._params.get_value("param1"))
+    self.assertEqual(3, self._params.get_value("param2"))
+
+    # Both should be marked as changed.
+    changed = self._params.get_changed()
+    self.assertEqual(2, len(changed))
+    self.assertIn("param1", changed)
+    self.assertIn("param2", changed)
+
+    # Updating without changing anything should not mark them.
+    self._params.update_many({"param1": 2, "param2": 3})
+    self.assertListEqual([], self._params.get_changed())
+
+  def test_update_many_bad_param(self):
+    """ Tests that update_many() handles a bad parameter name, without
+    applying any of the updates. """
+    self._params.add("param1", 0)
+
+    self.assertRaises(NameError, self._params.update_many,
+                      {"param1": 1, "param2": 2})
+
+    # Nothing should have been applied.
+    self.assertEqual(0, self._params.get_value("param1"))
+
   def test_update_bad_param(self):
     """ Tests that update() handles a bad parameter name. """
     # Try to update a parameter that doesn't exist.
     self.assertRaises(NameError, self._params.update, "param", 0)
 
+  def test_fetch_add(self):
+    """ Tests that fetch_add() works under normal conditions. """
+    self._params.add("param", 1)
+
+    # It should return the new value.
+    self.assertEqual(3, self._params.fetch_add("param", 2))
+    self.assertEqual(3, self._params.get_value("param"))
+
+    # Clear the changed set.
+    self._params.get_changed()
+
+    # It should mark the parameter as changed.
+    self._params.fetch_add("param", 1)
+    self.assertListEqual(["param"], self._params.get_changed())
+
+  def test_fetch_add_bad_param(self):
+    """ Tests that fetch_add() handles a bad parameter name. """
+    self.assertRaises(NameError, self._params.fetch_add, "param", 1)
+
   def test_get_value(self):
     """ Tests that get_value() works under normal conditions. """
     # Add a value.
@@ -147,6 +200,60 @@ class TestStatus(TestParams):
     # The latest datapoints should still be there.
     self.assertEqual(max_len, history[-1])
 
+  def test_bulk_update(self):
+    """ Tests that bulk_update() works under normal conditions. """
+    self._params.add("status", 0)
+
+    # Flush a batch of changes, recording only the latest value.
+    self._params.bulk_update("status", 5)
+
+    self.assertEqual(5, self._params.get_value("status"))
+    self.assertListEqual([0, 5], self._params.get_history("status"))
+
+    # Flush a batch of changes with the full history.
+    self._params.bulk_update("status", 8, history_extend=[6, 7, 8])
+
+    self.assertEqual(8, self._params.get_value("status"))
+    self.assertListEqual([0, 5, 6, 7, 8], self._params.get_history("status"))
+
+  def test_bulk_update_length_limit(self):
+    """ Tests that bulk_update() correctly limits the amount of history that
+    we collect. """
+    self._params.add("status", 0)
+
+    # Add a lot of historical data at once.
+    max_len = params.Status._MAX_HISTORY_LEN
+    history = list(range(1, max_len + 2))
+    self._params.bulk_update("status", history[-1], history_extend=history)
+
+    # It should have dropped the old data points.
+    history = self._params.get_history("status")
+    self.assertEqual(max_len, len(history))
+    # The latest datapoints should still be there.
+    self.assertEqual(max_len + 1, history[-1])
+
+  def test_update_many_history(self):
+    """ Tests that update_many() records the new values in the histories. """
+    self._params.add("status1", 0)
+    self._params.add("status2", 1)
+
+    self._params.update_many({"status1": 2, "status2": 3})
+
+    self.assertListEqual([0, 2], self._params.get_history("status1"))
+    self.assertListEqual([1, 3], self._params.get_history("status2"))
+
+  def test_fetch_add_history(self):
+    """ Tests that fetch_add() records the new value in the history. """
+    self._params.add("status", 0)
+
+    self._params.fetch_add("status", 5)
+
+    self.assertListEqual([0, 5], self._params.get_history("status"))
+
+  def test_bulk_update_bad_param(self):
+    """ Tests that bulk_update() handles a bad parameter name. """
+    self.assertRaises(NameError, self._params.bulk_update, "status", 0)
+
   def test_get_history(self):
     """ Tests that get_history() works under normal conditions. """
     # Create a status value and add some historical data.
@@ -162,3 +269,38 @@ class TestStatus(TestParams):
   def test_history_bad_param(self):
     """ Tests that get_history() handles a bad parameter name correctly. """
     self.assertRaises(NameError, self._params.get_history, "status")
+
+class TestSharedStatus(TestStatus):
+  """ Tests for the SharedStatus class. We inherit from TestStatus because
+  SharedStatus should behave identically to Status, aside from where its
+  storage lives. """
+
+  @classmethod
+  def setUpClass(cls):
+    # Share a single manager across the tests, since starting one is
+    # comparatively slow.
+    cls._manager = multiprocessing.Manager()
+
+  @classmethod
+  def tearDownClass(cls):
+    cls._manager.shutdown()
+
+  def setUp(self):
+    # Create instance for testing.
+    self._params = params.SharedStatus(manager=self._manager)
+
+  def test_shared_across_instances(self):
+    """ Tests that two instances backed by the same storage observe each
+    other's updates, the way separate worker processes would. """
+    self._params.add("status", 0)
+
+    # Create a second instance sharing the first one's storage.
+    other = params.SharedStatus(manager=self._manager)
+    other._parameters = self._params._parameters
+    other._param_histories = self._params._param_histories
+
+    other.update("status", 1)
+
+    # The update should be visible from the first instance.
+    self.assertEqual(1, self._params.get_value("status"))
+    self.assertListEqual([0, 1], self._params.get_history("status"))
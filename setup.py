@@ -1,9 +1,20 @@
-from distutils.core import setup
+from setuptools import setup
+
+try:
+  from Cython.Build import cythonize
+
+  # Build the compiled training-loop driver when Cython is available. The
+  # package falls back to pure Python without it.
+  ext_modules = cythonize(["rhodopsin/_train_inner.pyx"])
+except ImportError:
+  ext_modules = []
 
 setup(
   name="rhodopsin",
   version="0.3.0",
   packages=["rhodopsin"],
   license="MIT",
-  long_description=open("README.md").read()
+  long_description=open("README.md").read(),
+  ext_modules=ext_modules,
+  extras_require={"fast": ["cython"]},
 )